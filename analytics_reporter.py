@@ -14,8 +14,8 @@ import traceback
 import json
 import logging
 from datetime import datetime
-from ga_data_fetcher import get_data
-from utils import format_date, write_to_csv, append_to_csv, clear_csv_file, clean_name, load_progress, save_progress
+from ga_data_fetcher import get_data, get_data_pair
+from utils import format_date, write_to_csv, append_to_csv, write_or_append_csv, clear_csv_file, clean_name, load_progress, save_progress
 
 interrupted = False  # Global variable to track if an interrupt signal was received
 
@@ -82,11 +82,34 @@ def log_quota_exceeded(view_id):
         log_file.write(f"{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
 
 
-def generate_report(report_config, start_date, end_date, api_key, view_id, report_name, output_file, sequence=None):
-    """Generate report based on provided configuration."""
+def is_partial_pair_progress(progress_entry):
+    """Check whether a progress entry was saved part way through a paired run.
+
+    Paired entries also hold the output file of the other period. Their page token is an
+    offset into the rows of both periods, so it cannot be used to resume either period alone.
+    """
+    return bool(progress_entry) and len(progress_entry) > 2 and bool(progress_entry[0])
+
+def is_pair_progress(progress_data, output_file, compare_output_file):
+    """Check whether both periods have progress saved together by the same paired run."""
+    progress_entry = progress_data.get(output_file)
+    compare_progress_entry = progress_data.get(compare_output_file)
+    if not progress_entry or not compare_progress_entry:
+        return False
+    return len(progress_entry) > 2 and len(compare_progress_entry) > 2 and \
+        progress_entry[2] == compare_output_file and compare_progress_entry[2] == output_file and \
+        progress_entry[0] == compare_progress_entry[0]
+
+def generate_report(report_config, start_date, end_date, api_key, view_id, report_name, output_file, sequence=None, compare_start_date=None, compare_end_date=None, compare_output_file=None):
+    """Generate report based on provided configuration.
+
+    If a compare period and output file are given, both periods are fetched with
+    two date ranges per request and written to their own output files.
+    """
     global interrupted
     success = False
     data = []
+    compare_data = []
 
     if not report_config:
         logging.error("Report configuration not found.")
@@ -103,14 +126,23 @@ def generate_report(report_config, start_date, end_date, api_key, view_id, repor
     progress_data = load_progress(progress_file)
 
     total_records_downloaded = 0
+    compare_records_downloaded = 0
     first_page = True
 
+    if not compare_output_file and is_partial_pair_progress(progress_data.get(output_file)):
+        logging.info(f"Restarting {output_file} as its progress was saved by an unfinished paired run")
+        del progress_data[output_file]
+
     if output_file in progress_data:
-        next_page_token, total_records_downloaded = progress_data[output_file]
+        next_page_token, total_records_downloaded = progress_data[output_file][:2]
         total_records_downloaded = int(total_records_downloaded)
+        if compare_output_file in progress_data:
+            compare_records_downloaded = int(progress_data[compare_output_file][1])
         first_page = False
     else:
         clear_csv_file(output_file)
+        if compare_output_file:
+            clear_csv_file(compare_output_file)
         next_page_token = None
 
     try:
@@ -131,7 +163,10 @@ def generate_report(report_config, start_date, end_date, api_key, view_id, repor
                 break
 
             try:
-                data, next_page_token, sampling_info, quota_exceeded = get_data(api_key, view_id, dimensions, metrics, start_date, end_date, format_date, page_size, next_page_token, sampling_level, metrics_filter)
+                if compare_output_file:
+                    (data, compare_data), next_page_token, sampling_info, quota_exceeded = get_data_pair(api_key, view_id, dimensions, metrics, (start_date, end_date), (compare_start_date, compare_end_date), format_date, page_size, next_page_token, sampling_level, metrics_filter)
+                else:
+                    data, next_page_token, sampling_info, quota_exceeded = get_data(api_key, view_id, dimensions, metrics, start_date, end_date, format_date, page_size, next_page_token, sampling_level, metrics_filter)
                 if quota_exceeded:
                     log_quota_exceeded(view_id)
                     break
@@ -142,11 +177,16 @@ def generate_report(report_config, start_date, end_date, api_key, view_id, repor
                   log_sampling_info(output_dir, view_id, report_name, sampling_info, sequence)
                 else:
                   logging.info("Data is not sampled.")
-                if not data:
+                if not data and not compare_data:
                     logging.info(f"No data available to download for {output_file}")
                     break
 
-                if first_page:
+                if compare_output_file:
+                    # Either period may have no rows on a page, so write the header on first use
+                    write_or_append_csv(data, output_file)
+                    write_or_append_csv(compare_data, compare_output_file)
+                    first_page = False
+                elif first_page:
                     write_to_csv(data, output_file)
                     first_page = False
                 else:
@@ -156,7 +196,15 @@ def generate_report(report_config, start_date, end_date, api_key, view_id, repor
 
                 logging.info(f"Total records downloaded for {output_file}: {total_records_downloaded}")
 
-                progress_data[output_file] = (next_page_token if next_page_token else '', total_records_downloaded)
+                if compare_output_file:
+                    # Both periods share a page token into the rows of both date ranges, so each
+                    # entry records the other period's file; only the pair can resume from it
+                    compare_records_downloaded += len(compare_data)
+                    logging.info(f"Total records downloaded for {compare_output_file}: {compare_records_downloaded}")
+                    progress_data[output_file] = (next_page_token if next_page_token else '', total_records_downloaded, compare_output_file)
+                    progress_data[compare_output_file] = (next_page_token if next_page_token else '', compare_records_downloaded, output_file)
+                else:
+                    progress_data[output_file] = (next_page_token if next_page_token else '', total_records_downloaded)
                 save_progress(progress_file, progress_data)
 
                 if not next_page_token or interrupted:
@@ -179,17 +227,41 @@ def generate_report(report_config, start_date, end_date, api_key, view_id, repor
     finally:
         if success and data:
             logging.info(f"Data available in CSV file: {output_file}")
+        if success and compare_data:
+            logging.info(f"Data available in CSV file: {compare_output_file}")
 
-def generate_all_reports(report_configs, start_date, end_date, api_key, view_id, property_name, sequence=None):
-    """Generate all reports specified in the configuration."""
-    property_name_clean = clean_name(property_name) if property_name else ""
+def generate_report_for_periods(report_config, start_date, end_date, api_key, view_id, property_name, sequence=None, compare_start_date=None, compare_end_date=None, compare_sequence=None):
+    """Generate a report for a period and, if given, a compare period."""
+    report_name = report_config['name']
+    output_file = construct_output_file(property_name, view_id, report_config['id'], report_name, sequence)
+
+    if not compare_start_date:
+        generate_report(report_config, start_date, end_date, api_key, view_id, report_name, output_file, sequence)
+        return
+
+    compare_output_file = construct_output_file(property_name, view_id, report_config['id'], report_name, compare_sequence)
 
+    # A pair is fetched together if neither period has started, or resumed from progress
+    # the pair saved itself; otherwise each period continues or restarts on its own
+    progress_file = os.path.join(os.path.dirname(output_file), construct_log_file(view_id, report_name, sequence, "progress"))
+    progress_data = load_progress(progress_file)
+    fresh_pair = output_file not in progress_data and compare_output_file not in progress_data
+
+    if report_config.get('metrics_filter', False) or not (fresh_pair or is_pair_progress(progress_data, output_file, compare_output_file)):
+        # Metric filters are not evaluated per date range, so fetch each period on its own
+        generate_report(report_config, start_date, end_date, api_key, view_id, report_name, output_file, sequence)
+        if not interrupted:
+            generate_report(report_config, compare_start_date, compare_end_date, api_key, view_id, report_name, compare_output_file, compare_sequence)
+    else:
+        generate_report(report_config, start_date, end_date, api_key, view_id, report_name, output_file, sequence, compare_start_date, compare_end_date, compare_output_file)
+
+def generate_all_reports(report_configs, start_date, end_date, api_key, view_id, property_name, sequence=None, compare_start_date=None, compare_end_date=None, compare_sequence=None):
+    """Generate all reports specified in the configuration."""
     for report_config in report_configs:
         report_name = report_config['name']
-        output_file = construct_output_file(property_name, view_id, report_config['id'], report_name, sequence)
 
         logging.info(f"Generating report for {report_name}")
-        generate_report(report_config, start_date, end_date, api_key, view_id, report_name, output_file, sequence)
+        generate_report_for_periods(report_config, start_date, end_date, api_key, view_id, property_name, sequence, compare_start_date, compare_end_date, compare_sequence)
         if interrupted:
             logging.info("Interrupted! Stopping further report generation.")
             break
@@ -204,8 +276,16 @@ def main():
     parser.add_argument('-e', '--end', type=str, required=True, help='End date (YYYY-MM-DD)')
     parser.add_argument('--settings', type=str, help='Path to settings YAML file')
     parser.add_argument('--sequence', type=str, help='Optional sequence prefix for the output file name')
+    parser.add_argument('--compare_start', type=str, help='Start date of a second period fetched in the same requests (YYYY-MM-DD)')
+    parser.add_argument('--compare_end', type=str, help='End date of the second period (YYYY-MM-DD)')
+    parser.add_argument('--compare_sequence', type=str, help='Sequence for the output file name of the second period')
     args = parser.parse_args()
 
+    if bool(args.compare_start) != bool(args.compare_end):
+        parser.error('--compare_start and --compare_end must be given together')
+    if args.compare_start and (not args.compare_sequence or args.compare_sequence == args.sequence):
+        parser.error('--compare_start requires a --compare_sequence different from --sequence')
+
     settings_file = args.settings if args.settings else "settings.yml"
     settings = load_yaml_config(settings_file)
     report_configs = load_yaml_config(settings['analytics_settings']['reports_config'])
@@ -223,12 +303,11 @@ def main():
             logging.error(f"Report configuration for ID {args.report_id} not found.")
             return
         report_name = report_config['name']
-        output_file = construct_output_file(property_name, view_id, args.report_id, report_name, args.sequence)
 
         logging.info(f"Generate report for {report_name}")
-        generate_report(report_config, args.start, args.end, api_key, view_id, report_name, output_file, args.sequence)
+        generate_report_for_periods(report_config, args.start, args.end, api_key, view_id, property_name, args.sequence, args.compare_start, args.compare_end, args.compare_sequence)
     else:
-        generate_all_reports(report_configs['reports'], args.start, args.end, api_key, view_id, property_name, args.sequence)
+        generate_all_reports(report_configs['reports'], args.start, args.end, api_key, view_id, property_name, args.sequence, args.compare_start, args.compare_end, args.compare_sequence)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,128 @@
+"""
+Encoded Data
+
+Author: Vimal Joseph
+More Information: https://www.zyxware.com/article/6662/backup-universal-analytics-data-python
+
+Dictionary-encoded storage for report rows. Each unique value is stored once in a
+shared value table and rows keep only its integer code, one array per column, so
+memory and output size grow with the number of unique values instead of cells.
+"""
+import json
+import sys
+from array import array
+
+# Codes are stored as 4-byte unsigned integers
+CODE_TYPECODE = next((typecode for typecode in ('I', 'L') if array(typecode).itemsize == 4), None)
+if CODE_TYPECODE is None:
+    raise ImportError("No 4-byte unsigned integer array type is available on this platform")
+MAX_VALUES = 2 ** 32
+
+class ValueTable:
+    """Table of unique values, each referred to by its position in the table."""
+
+    def __init__(self, values=None):
+        self.values = []
+        self.codes = {}
+        for value in values or []:
+            self.encode(value)
+
+    def encode(self, value):
+        """Return the code for the value, adding it to the table if it is new."""
+        code = self.codes.get(value)
+        if code is None:
+            code = len(self.values)
+            if code >= MAX_VALUES:
+                raise ValueError(f"Value table is full: more than {MAX_VALUES} unique values")
+            self.codes[value] = code
+            self.values.append(value)
+        return code
+
+    def __len__(self):
+        return len(self.values)
+
+class EncodedRows:
+    """Rows stored as one array of value codes per column.
+
+    Indexing and iterating yield decoded row dicts, so it can be used wherever a
+    list of row dicts is expected, such as the CSV writers in utils.
+    """
+
+    def __init__(self, columns, value_table=None):
+        self.columns = list(columns)
+        self.value_table = value_table if value_table is not None else ValueTable()
+        self.codes = [array(CODE_TYPECODE) for _ in self.columns]
+        self.row_count = 0
+
+    def append(self, values):
+        """Append a row given its values in column order."""
+        encode = self.value_table.encode
+        for column_codes, value in zip(self.codes, values):
+            column_codes.append(encode(value))
+        self.row_count += 1
+
+    def add_column(self, column, fill_value=''):
+        """Add a column, using the fill value for the rows already stored."""
+        self.columns.append(column)
+        self.codes.append(array(CODE_TYPECODE, [self.value_table.encode(fill_value)]) * self.row_count)
+
+    def row_values(self, index):
+        """Return the decoded values of a row in column order."""
+        values = self.value_table.values
+        return [values[column_codes[index]] for column_codes in self.codes]
+
+    def value(self, index, column):
+        """Return the decoded value of a single cell."""
+        return self.value_table.values[self.codes[self.columns.index(column)][index]]
+
+    def iter_values(self):
+        """Iterate over rows as lists of values in column order."""
+        for index in range(self.row_count):
+            yield self.row_values(index)
+
+    def __len__(self):
+        return self.row_count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [dict(zip(self.columns, self.row_values(i))) for i in range(self.row_count)[index]]
+        return dict(zip(self.columns, self.row_values(range(self.row_count)[index])))
+
+    def __iter__(self):
+        for values in self.iter_values():
+            yield dict(zip(self.columns, values))
+
+def save_encoded(rows, path_prefix):
+    """Write rows as '<path_prefix>.json' holding the columns and value table and '<path_prefix>.codes' holding the code arrays."""
+    header = {
+        'columns': rows.columns,
+        'row_count': len(rows),
+        'typecode': CODE_TYPECODE,
+        'itemsize': array(CODE_TYPECODE).itemsize,
+        'byteorder': sys.byteorder,
+        'values': rows.value_table.values,
+    }
+    with open(f"{path_prefix}.json", 'w', encoding='utf-8') as header_file:
+        json.dump(header, header_file, ensure_ascii=False)
+    with open(f"{path_prefix}.codes", 'wb') as codes_file:
+        for column_codes in rows.codes:
+            column_codes.tofile(codes_file)
+
+def load_encoded(path_prefix):
+    """Read rows written by save_encoded."""
+    with open(f"{path_prefix}.json", 'r', encoding='utf-8') as header_file:
+        header = json.load(header_file)
+
+    rows = EncodedRows(header['columns'])
+    rows.value_table.values = header['values']
+    rows.value_table.codes = {value: code for code, value in enumerate(header['values'])}
+    rows.row_count = header['row_count']
+
+    with open(f"{path_prefix}.codes", 'rb') as codes_file:
+        for column_codes in rows.codes:
+            if column_codes.itemsize != header['itemsize']:
+                raise ValueError(f"Code size {header['itemsize']} in {path_prefix}.codes is not supported on this platform")
+            column_codes.fromfile(codes_file, rows.row_count)
+            if header['byteorder'] != sys.byteorder:
+                column_codes.byteswap()
+    return rows
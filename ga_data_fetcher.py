@@ -10,8 +10,30 @@ from googleapiclient.discovery import build
 from oauth2client.service_account import ServiceAccountCredentials
 from googleapiclient.errors import HttpError
 import logging
+from encoded_data import EncodedRows, ValueTable
 
 def get_data(api_key, view_id, dimensions, metrics, start_date, end_date, date_formatter, page_size=5000, next_page_token=None, sample_size='DEFAULT', metric_filter=False):
+    date_ranges = [(start_date, end_date)]
+    data, new_next_page_token, sampling_info, quota_exceeded = fetch_report(api_key, view_id, dimensions, metrics, date_ranges, date_formatter, page_size, next_page_token, sample_size, metric_filter)
+    return data[0], new_next_page_token, sampling_info, quota_exceeded
+
+def get_data_pair(api_key, view_id, dimensions, metrics, date_range, compare_date_range, date_formatter, page_size=5000, next_page_token=None, sample_size='DEFAULT', metric_filter=False):
+    """Fetch two periods in a single request, returning a (data, compare_data) pair."""
+    date_ranges = [date_range, compare_date_range]
+    data, new_next_page_token, sampling_info, quota_exceeded = fetch_report(api_key, view_id, dimensions, metrics, date_ranges, date_formatter, page_size, next_page_token, sample_size, metric_filter)
+    return (data[0], data[1]), new_next_page_token, sampling_info, quota_exceeded
+
+def is_empty_metrics(values):
+    """Check whether every metric value of a date range is zero."""
+    try:
+        return all(float(value) == 0 for value in values)
+    except ValueError:
+        return False
+
+def fetch_report(api_key, view_id, dimensions, metrics, date_ranges, date_formatter, page_size=5000, next_page_token=None, sample_size='DEFAULT', metric_filter=False):
+    """Fetch one page of a report for one or two date ranges, returning one set of rows per date range."""
+    empty_data = [[] for _ in date_ranges]
+
     # Initialize service
     credentials = ServiceAccountCredentials.from_json_keyfile_name(api_key)
     service = build('analyticsreporting', 'v4', credentials=credentials)
@@ -19,7 +41,7 @@ def get_data(api_key, view_id, dimensions, metrics, start_date, end_date, date_f
     # Prepare the report request body
     report_request = {
         'viewId': view_id,
-        'dateRanges': [{'startDate': start_date, 'endDate': end_date}],
+        'dateRanges': [{'startDate': start_date, 'endDate': end_date} for start_date, end_date in date_ranges],
         'dimensions': [{'name': d} for d in dimensions],
         'metrics': [{'expression': m} for m in metrics],
         'pageSize': page_size,
@@ -41,10 +63,12 @@ def get_data(api_key, view_id, dimensions, metrics, start_date, end_date, date_f
 
         report = response.get('reports', [])[0]  # Assuming one report request
 
-        # Process report data
-        formatted_data = []
         column_header_entries = report['columnHeader']['dimensions'] + \
                                 [entry['name'] for entry in report['columnHeader']['metricHeader']['metricHeaderEntries']]
+        # Process report data, one set of rows per date range sharing the page's value table
+        value_table = ValueTable()
+        formatted_data = [EncodedRows(column_header_entries, value_table) for _ in date_ranges]
+        date_index = column_header_entries.index('ga:date') if 'ga:date' in column_header_entries else None
         rows = report.get('data', {}).get('rows', [])
         samples_read_counts = report.get('data', {}).get('samplesReadCounts', [])
         sampling_space_sizes = report.get('data', {}).get('samplingSpaceSizes', [])
@@ -56,16 +80,17 @@ def get_data(api_key, view_id, dimensions, metrics, start_date, end_date, date_f
         }
 
         for row in rows:
-            formatted_row = {}
             dimensions_data = row['dimensions']
-            metrics_data = row['metrics'][0]['values']
-            all_data = dimensions_data + metrics_data
-            for i, header in enumerate(column_header_entries):
-                if header == 'ga:date':
-                    formatted_row[header] = date_formatter(all_data[i])
-                else:
-                    formatted_row[header] = all_data[i]
-            formatted_data.append(formatted_row)
+            for range_index, range_data in enumerate(formatted_data):
+                metrics_data = row['metrics'][range_index]['values']
+                # With two date ranges a row is returned if either range has data;
+                # skip it for the range where it would not have been returned on its own
+                if len(date_ranges) > 1 and is_empty_metrics(metrics_data):
+                    continue
+                all_data = dimensions_data + metrics_data
+                if date_index is not None:
+                    all_data[date_index] = date_formatter(all_data[date_index])
+                range_data.append(all_data)
 
         # Get the next page token, if any
         new_next_page_token = report.get('nextPageToken', None)
@@ -75,11 +100,11 @@ def get_data(api_key, view_id, dimensions, metrics, start_date, end_date, date_f
     except HttpError as error:
         if error.resp.status == 429:
             logging.error("Quota Error: Quota exceeded. Please try again later.")
-            return [], None, {'is_sampled': False, 'samples_read_counts': [], 'sampling_space_sizes': []}, True
+            return empty_data, None, {'is_sampled': False, 'samples_read_counts': [], 'sampling_space_sizes': []}, True
         else:
             logging.error(f"Error fetching data: {error}")
-            return [], None, {'is_sampled': False, 'samples_read_counts': [], 'sampling_space_sizes': []}, False
+            return empty_data, None, {'is_sampled': False, 'samples_read_counts': [], 'sampling_space_sizes': []}, False
     except Exception as e:
         logging.error(f"An error occurred: {e}")
-        return [], None, {'is_sampled': False, 'samples_read_counts': [], 'sampling_space_sizes': []}, False
+        return empty_data, None, {'is_sampled': False, 'samples_read_counts': [], 'sampling_space_sizes': []}, False
 
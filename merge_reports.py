@@ -1,10 +1,46 @@
 import os
-import pandas as pd
+import csv
 from glob import glob
 import argparse
 import re
+from encoded_data import EncodedRows, ValueTable, save_encoded
 
-def merge_report_files(input_dir, output_dir):
+def read_report_file(filepath, merged_rows, value_table):
+    """Append the rows of a report CSV file to the merged rows, creating them from the header if needed."""
+    with open(filepath, 'r', newline='', encoding='utf-8') as csvfile:
+        reader = csv.reader(csvfile)
+        header = next(reader, None)
+        if header is None:
+            return merged_rows
+        if merged_rows is None:
+            merged_rows = EncodedRows(header, value_table)
+
+        if header != merged_rows.columns:
+            print(f"Header of {os.path.basename(filepath)} differs from earlier files of the report: {header}")
+            missing_columns = [column for column in merged_rows.columns if column not in header]
+            if missing_columns:
+                print(f"  Columns missing in this file are left empty: {missing_columns}")
+            for column in header:
+                if column not in merged_rows.columns:
+                    print(f"  New column {column} is left empty for earlier files")
+                    merged_rows.add_column(column)
+
+        # Map the merged columns to their position in this file
+        positions = [header.index(column) if column in header else None for column in merged_rows.columns]
+        for record in reader:
+            if not record:
+                continue
+            merged_rows.append(record[i] if i is not None and i < len(record) else '' for i in positions)
+    return merged_rows
+
+def write_encoded_csv(rows, output_file):
+    """Write encoded rows to a CSV file."""
+    with open(output_file, 'w', newline='', encoding='utf-8') as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(rows.columns)
+        writer.writerows(rows.iter_values())
+
+def merge_report_files(input_dir, output_dir, encoded=False):
     # Create output directory if it doesn't exist
     os.makedirs(output_dir, exist_ok=True)
 
@@ -36,25 +72,36 @@ def merge_report_files(input_dir, output_dir):
     with open(os.path.join(output_dir, 'all_reports.log'), 'w') as log_file:
         for key, files in report_files.items():
             files.sort()  # Sort files by sequence number
-            output_file = os.path.join(output_dir, f"{key}_report_full.csv")
+            output_prefix = os.path.join(output_dir, f"{key}_report_full")
+            output_file = f"{output_prefix}.json" if encoded else f"{output_prefix}.csv"
             total_records = 0
             start_date = None
             end_date = None
             num_files_merged = len(files)
 
-            merged_df = pd.DataFrame()
+            # One value table per report, so each repeated value is stored once
+            value_table = ValueTable()
+            merged_rows = None
             for seq, filepath in files:
-                df = pd.read_csv(filepath)
-                if 'ga:date' in df.columns:
+                first_row = len(merged_rows) if merged_rows is not None else 0
+                merged_rows = read_report_file(filepath, merged_rows, value_table)
+                if merged_rows is None:
+                    continue
+                num_records = len(merged_rows) - first_row  # Count all rows, no header adjustment
+                if 'ga:date' in merged_rows.columns and num_records:
                     if start_date is None:
-                        start_date = df['ga:date'].iloc[0]
-                    end_date = df['ga:date'].iloc[-1]
-                num_records = len(df)  # Count all rows, no header adjustment
+                        start_date = merged_rows.value(first_row, 'ga:date')
+                    end_date = merged_rows.value(len(merged_rows) - 1, 'ga:date')
                 total_records += num_records
-                merged_df = pd.concat([merged_df, df], ignore_index=True)
 
-            # Write the merged dataframe to CSV
-            merged_df.to_csv(output_file, index=False)
+            if merged_rows is None:
+                print(f"Skipping report {key}: No data to merge")
+                continue
+
+            if encoded:
+                save_encoded(merged_rows, output_prefix)
+            else:
+                write_encoded_csv(merged_rows, output_file)
 
             log_file.write(f"{output_file},{start_date or ''},{end_date or ''},{num_files_merged},{total_records}\n")
 
@@ -62,10 +109,11 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Merge report files into a single file for each report.')
     parser.add_argument('input_dir', type=str, help='Path to the input directory containing report files.')
     parser.add_argument('output_dir', type=str, nargs='?', default='.', help='Path to the output directory where merged files will be stored. Defaults to current directory.')
+    parser.add_argument('--encoded', action='store_true', help='Store merged reports dictionary-encoded as a .json value table and .codes file instead of CSV.')
 
     args = parser.parse_args()
 
     input_dir = args.input_dir
     output_dir = args.output_dir
 
-    merge_report_files(input_dir, output_dir)
+    merge_report_files(input_dir, output_dir, args.encoded)
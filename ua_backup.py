@@ -20,6 +20,7 @@ def parse_arguments():
     parser.add_argument('--settings', type=str, help='Path to settings YAML file')
     parser.add_argument('--report_id', type=int, help='ID of the report to generate')
     parser.add_argument('--report_level', type=str, choices=['day', 'week', 'month', 'year'], required=True, help='Report level to split date range')
+    parser.add_argument('--paired', action='store_true', help='Fetch consecutive periods two at a time using two date ranges per request')
     args = parser.parse_args()
     return args
 
@@ -74,6 +75,10 @@ def split_date_range(start, end, report_level):
 
     return periods
 
+def pair_periods(periods):
+    """Pair consecutive periods, leaving the last one unpaired if the count is odd."""
+    return [tuple(periods[i:i + 2]) for i in range(0, len(periods), 2)]
+
 def log_execution(start_date, end_date, sequence):
     """Log the execution details to the log file."""
     with open(log_file, 'a') as f:
@@ -105,7 +110,7 @@ def read_last_execution():
         last_start, last_end, last_sequence = last_line.strip().split(',')
         return last_start, last_end, int(last_sequence)
 
-def run_analytics_reporter(start_date, end_date, settings, report_id, sequence):
+def run_analytics_reporter(start_date, end_date, settings, report_id, sequence, compare_period=None):
     """Run the analytics_reporter.py script with the provided arguments."""
     global interrupted
     logger.info(f"Running analytics_reporter.py for period: {start_date} to {end_date}")
@@ -115,6 +120,14 @@ def run_analytics_reporter(start_date, end_date, settings, report_id, sequence):
         '--end', end_date,
         '--sequence', str(sequence)
     ]
+    if compare_period is not None:
+        compare_start, compare_end = compare_period
+        logger.info(f"Paired with period: {compare_start} to {compare_end}")
+        cmd.extend([
+            '--compare_start', compare_start,
+            '--compare_end', compare_end,
+            '--compare_sequence', str(sequence + 1)
+        ])
     if settings is not None:
         cmd.extend(['--settings', settings])
     if report_id is not None:
@@ -124,7 +137,9 @@ def run_analytics_reporter(start_date, end_date, settings, report_id, sequence):
     process = subprocess.Popen(cmd)
     try:
         process.wait()
-        log_execution(start_date, end_date, sequence)  # Log the execution after successful run
+        # Log the execution after successful run. A pair is logged under its first period
+        # so that resuming re-runs the whole pair if the report stopped early
+        log_execution(start_date, end_date, sequence)
     except KeyboardInterrupt:
         interrupted = True
         logger.info("Interrupt received. Waiting for the current report to complete...")
@@ -153,13 +168,22 @@ def main():
         periods = split_date_range(args.start, args.end, args.report_level)
         start_sequence = 1
 
-    for sequence, (start_date, end_date) in enumerate(periods, start=start_sequence):
+    if args.paired:
+        batches = pair_periods(periods)
+    else:
+        batches = [(period,) for period in periods]
+
+    sequence = start_sequence
+    for batch in batches:
         if interrupted:
             break
         if check_quota_exceeded():
             logging.info("Quota was exceeded recently. Exiting.")
             break
-        run_analytics_reporter(start_date, end_date, args.settings, args.report_id, sequence)
+        start_date, end_date = batch[0]
+        compare_period = batch[1] if len(batch) > 1 else None
+        run_analytics_reporter(start_date, end_date, args.settings, args.report_id, sequence, compare_period)
+        sequence += len(batch)
 
     if interrupted:
         logger.info("Execution was interrupted. Exiting after completing the current report.")
@@ -28,6 +28,16 @@ def append_to_csv(data, output_file):
         writer = csv.DictWriter(csvfile, fieldnames=data[0].keys())
         writer.writerows(data)
 
+def write_or_append_csv(data, output_file):
+    """Append to the CSV file, writing it with a header if it does not exist yet."""
+    if not data:
+        return
+
+    if os.path.exists(output_file):
+        append_to_csv(data, output_file)
+    else:
+        write_to_csv(data, output_file)
+
 def clear_csv_file(csv_file):
     if os.path.exists(csv_file):
         os.remove(csv_file)